@@ -12,10 +12,13 @@ Qlib 基础使用示例
 注意：运行本示例前，请确保已下载数据（参考 docs/02-数据准备.md）
 """
 
-import qlib
+from itertools import islice
+
 from qlib.constant import REG_CN
 from qlib.data import D
 
+from _cache import ensure_qlib_init
+
 
 def main():
     """主函数"""
@@ -25,7 +28,8 @@ def main():
     print("=" * 50)
 
     try:
-        qlib.init(
+        # 已初始化时（如通过 run_all.py 批量运行）会直接跳过
+        ensure_qlib_init(
             provider_uri='~/.qlib/qlib_data/cn_data',  # 数据路径
             region=REG_CN  # 市场区域：A 股
         )
@@ -69,10 +73,10 @@ def main():
             start_time='2020-09-20',
             end_time='2020-09-25'
         )
-        stocks = list(stocks_dict.keys())
+        # 用 islice 只取前5只，避免为了看前几个元素而把全部键物化成列表
         print(f"✅ 股票池获取成功")
-        print(f"   CSI300 股票数量（2020-09-20 至 2020-09-25）: {len(stocks)}")
-        print(f"   前5只股票: {stocks[:5]}\n")
+        print(f"   CSI300 股票数量（2020-09-20 至 2020-09-25）: {len(stocks_dict)}")
+        print(f"   前5只股票: {list(islice(stocks_dict, 5))}\n")
     except Exception as e:
         print(f"❌ 获取股票池失败: {e}\n")
 
@@ -91,8 +95,7 @@ def main():
             start_time='2020-01-01',
             end_time='2020-01-10'
         )
-        all_stocks = list(stocks_dict.keys())
-        sample_stocks = all_stocks[:3]  # 取前3只股票
+        sample_stocks = list(islice(stocks_dict, 3))  # 只取前3只股票
 
         # 查询收盘价和成交量
         data = D.features(
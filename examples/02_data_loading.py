@@ -11,10 +11,13 @@
 注意：运行本示例前，请确保已下载数据（参考 docs/02-数据准备.md）
 """
 
-import qlib
+from itertools import islice
+
 from qlib.constant import REG_CN, REG_US
 from qlib.data import D
 
+from _cache import ensure_qlib_init
+
 
 def load_cn_data():
     """加载 A 股数据示例"""
@@ -24,7 +27,7 @@ def load_cn_data():
 
     try:
         # 初始化 A 股数据
-        qlib.init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
+        ensure_qlib_init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
         print("✅ A 股数据初始化成功\n")
 
         # 获取不同的股票池
@@ -32,9 +35,9 @@ def load_cn_data():
         instruments_300 = D.instruments(market='csi300')
         # 使用 list_instruments 获取股票列表（更高效）
         stocks_300_dict = D.list_instruments(instruments=instruments_300)
-        stocks_300 = list(stocks_300_dict.keys())
-        print(f"   股票数量（全部）: {len(stocks_300)}")
-        print(f"   前5只股票: {stocks_300[:5]}\n")
+        # 用 islice 只取前几只，避免为了预览而把全部键物化成列表
+        print(f"   股票数量（全部）: {len(stocks_300_dict)}")
+        print(f"   前5只股票: {list(islice(stocks_300_dict, 5))}\n")
 
         # 使用日期筛选获取特定时间段的股票
         print("   1.1. CSI300 股票池（带日期筛选）:")
@@ -43,9 +46,8 @@ def load_cn_data():
             start_time='2020-09-20',
             end_time='2020-09-25'
         )
-        stocks_300_filtered = list(stocks_300_filtered_dict.keys())
-        print(f"   股票数量（2020-09-20 至 2020-09-25）: {len(stocks_300_filtered)}")
-        print(f"   前5只股票: {stocks_300_filtered[:5]}\n")
+        print(f"   股票数量（2020-09-20 至 2020-09-25）: {len(stocks_300_filtered_dict)}")
+        print(f"   前5只股票: {list(islice(stocks_300_filtered_dict, 5))}\n")
 
         print("2. CSI500 股票池:")
         try:
@@ -56,9 +58,8 @@ def load_cn_data():
                 start_time='2020-01-01',
                 end_time='2020-01-10'
             )
-            stocks_500 = list(stocks_500_dict.keys())
-            print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_500)}")
-            print(f"   前5只股票: {stocks_500[:5]}\n")
+            print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_500_dict)}")
+            print(f"   前5只股票: {list(islice(stocks_500_dict, 5))}\n")
         except Exception as e:
             print(f"   ⚠️ CSI500 数据可能不存在: {e}\n")
 
@@ -71,15 +72,14 @@ def load_cn_data():
                 start_time='2020-01-01',
                 end_time='2020-01-10'
             )
-            stocks_all = list(stocks_all_dict.keys())
-            print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_all)}")
-            print(f"   前5只股票: {stocks_all[:5]}\n")
+            print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_all_dict)}")
+            print(f"   前5只股票: {list(islice(stocks_all_dict, 5))}\n")
         except Exception as e:
             print(f"   ⚠️ 全市场数据可能不存在: {e}\n")
 
         # 查询数据
         print("4. 查询 CSI300 数据:")
-        sample_stocks = list(stocks_300)[:3]
+        sample_stocks = list(islice(stocks_300_dict, 3))
         data = D.features(
             instruments=sample_stocks,
             fields=['$close', '$volume'],
@@ -102,7 +102,7 @@ def load_us_data():
 
     try:
         # 初始化美股数据
-        qlib.init(provider_uri='~/.qlib/qlib_data/us_data', region=REG_US)
+        ensure_qlib_init(provider_uri='~/.qlib/qlib_data/us_data', region=REG_US)
         print("✅ 美股数据初始化成功\n")
 
         # 获取股票池
@@ -114,13 +114,12 @@ def load_us_data():
             start_time='2020-01-01',
             end_time='2020-01-10'
         )
-        stocks_all = list(stocks_all_dict.keys())
-        print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_all)}")
-        print(f"   前5只股票: {stocks_all[:5]}\n")
+        print(f"   股票数量（2020-01-01 至 2020-01-10）: {len(stocks_all_dict)}")
+        print(f"   前5只股票: {list(islice(stocks_all_dict, 5))}\n")
 
         # 查询数据
         print("2. 查询美股数据:")
-        sample_stocks = list(stocks_all)[:3]
+        sample_stocks = list(islice(stocks_all_dict, 3))
         data = D.features(
             instruments=sample_stocks,
             fields=['$close', '$volume'],
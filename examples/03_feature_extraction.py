@@ -11,11 +11,13 @@
 注意：运行本示例前，请确保已下载数据（参考 docs/02-数据准备.md）
 """
 
-import qlib
+from itertools import islice
+
 from qlib.constant import REG_CN
-from qlib.contrib.data.handler import Alpha158
 from qlib.data.dataset import DatasetH
 
+from _cache import ensure_qlib_init, get_or_build_alpha158
+
 
 def main():
     """主函数"""
@@ -25,7 +27,8 @@ def main():
     print("=" * 50)
 
     try:
-        qlib.init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
+        # 已初始化时（如通过 run_all.py 批量运行）会直接跳过
+        ensure_qlib_init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
         print("✅ Qlib 初始化成功\n")
     except Exception as e:
         print(f"❌ Qlib 初始化失败: {e}")
@@ -38,8 +41,8 @@ def main():
     print("=" * 50)
 
     try:
-        # 创建 Alpha158 数据处理器
-        handler = Alpha158(
+        # 创建 Alpha158 数据处理器（结果会缓存到磁盘，重复运行时直接加载）
+        handler = get_or_build_alpha158(
             start_time='2020-01-01',
             end_time='2020-12-31',
             fit_start_time='2020-01-01',
@@ -65,15 +68,8 @@ def main():
     print("=" * 50)
 
     try:
-        # 重新创建 handler（因为 fetch() 后可能无法再次使用）
-        handler = Alpha158(
-            start_time='2020-01-01',
-            end_time='2020-12-31',
-            fit_start_time='2020-01-01',
-            fit_end_time='2020-12-31',
-            instruments='csi300'
-        )
-
+        # 复用步骤2的 handler：fetch() 不会消耗数据，DatasetH 可以直接使用，
+        # 无需重新计算一遍 158 个因子
         # 创建数据集，划分训练/验证/测试集
         dataset = DatasetH(
             handler=handler,
@@ -117,8 +113,7 @@ def main():
             start_time='2020-01-01',
             end_time='2020-01-31'
         )
-        all_stocks = list(stocks_dict.keys())
-        sample_stocks = all_stocks[:5]
+        sample_stocks = list(islice(stocks_dict, 5))  # 只取前5只股票
 
         # 构建自定义特征
         fields = [
@@ -13,14 +13,16 @@
 本示例需要较长时间运行，因为包含模型训练和回测
 """
 
-import qlib
+import gc
+
 from qlib.constant import REG_CN
 from qlib.contrib.model.gbdt import LGBModel
 from qlib.data.dataset import DatasetH
-from qlib.contrib.data.handler import Alpha158
 from qlib.contrib.strategy.strategy import TopkDropoutStrategy
 from qlib.workflow.record_temp import PortAnaRecord
 
+from _cache import downcast_float32, ensure_qlib_init, get_or_build_alpha158
+
 
 def main():
     """主函数"""
@@ -30,7 +32,8 @@ def main():
     print("=" * 50)
 
     try:
-        qlib.init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
+        # 已初始化时（如通过 run_all.py 批量运行）会直接跳过
+        ensure_qlib_init(provider_uri='~/.qlib/qlib_data/cn_data', region=REG_CN)
         print("✅ Qlib 初始化成功\n")
     except Exception as e:
         print(f"❌ Qlib 初始化失败: {e}")
@@ -43,7 +46,8 @@ def main():
     print("=" * 50)
 
     try:
-        handler = Alpha158(
+        # 构建 Alpha158 处理器（结果会缓存到磁盘，重复运行时直接加载）
+        handler = get_or_build_alpha158(
             start_time='2008-01-01',
             end_time='2020-12-31',
             fit_start_time='2008-01-01',
@@ -74,12 +78,17 @@ def main():
         model.fit(dataset)
         print("✅ 模型训练完成\n")
 
-        # 获取测试集预测
-        test_data = dataset.prepare('test')
+        # 获取测试集预测：prepare('test') 只调用一次，后续直接复用 test_data
+        # 和 pred，避免回测阶段重复计算特征
+        test_data = downcast_float32(dataset.prepare('test'))
         pred = model.predict(test_data)
         print(f"✅ 预测信号生成成功")
         print(f"   预测信号形状: {pred.shape}\n")
 
+        # 回测只用 pred 信号，提前释放测试特征帧，降低回测阶段内存峰值
+        del test_data
+        gc.collect()
+
     except Exception as e:
         print(f"❌ 数据和模型准备失败: {e}\n")
         return
@@ -97,7 +106,8 @@ def main():
             'kwargs': {
                 'topk': 50,           # 持仓 50 只股票
                 'n_drop': 5,         # 每次至少换 5 只
-                'signal': pred       # 预测信号
+                'signal': pred       # 直接传入已算好的预测信号 DataFrame，
+                                     # 策略不会再走一遍内部预测路径
             }
         }
 
@@ -20,21 +20,41 @@
 
 import argparse
 import sys
-import pickle
+import traceback
+import joblib
+import numpy as np
 import qlib
 from qlib.constant import REG_CN, REG_US
 from qlib.contrib.model.gbdt import LGBModel
 from qlib.data.dataset import DatasetH
-from qlib.contrib.data.handler import Alpha158
 from qlib.contrib.strategy.strategy import TopkDropoutStrategy
 from qlib.workflow.record_temp import PortAnaRecord
 
+from _cache import enable_buffered_reads, get_or_build_alpha158
+
+
+def top_k(scores, k):
+    """返回分数最高的 K 个位置（按分数从高到低排列）
+
+    用 np.argpartition 做 O(N) 的部分选择，只对选出的 K 个做完整排序，
+    避免为取 Top-K 而对整个股票池做 O(N log N) 全排序。
+    """
+    k = min(k, scores.size)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def _rank_day(day, k):
+    """单个交易日的 Top-K"""
+    return day.iloc[top_k(day.to_numpy(), k)]
+
 
 def train_model(provider_uri, region, market, train_start, train_end):
-    """训练模型"""
+    """训练模型，返回 (model, handler) 以便预测阶段复用已拟合的 handler"""
     print("正在训练模型...")
 
-    handler = Alpha158(
+    # 构建 Alpha158 处理器（结果会缓存到磁盘，重复运行时直接加载）
+    handler = get_or_build_alpha158(
         start_time=train_start,
         end_time=train_end,
         fit_start_time=train_start,
@@ -60,7 +80,7 @@ def train_model(provider_uri, region, market, train_start, train_end):
     model.fit(dataset)
     print("✅ 模型训练完成")
 
-    return model
+    return model, handler
 
 
 def main():
@@ -141,6 +161,12 @@ def main():
         default=None,
         help='预训练模型路径（可选）'
     )
+    parser.add_argument(
+        '--save_model',
+        type=str,
+        default=None,
+        help='训练完成后保存模型到该路径（可选）'
+    )
     parser.add_argument(
         '--enable_backtest',
         action='store_true',
@@ -159,6 +185,7 @@ def main():
     try:
         region = REG_CN if args.region == 'cn' else REG_US
         qlib.init(provider_uri=args.provider_uri, region=region)
+        enable_buffered_reads()  # 大块预读缓冲，加速 .bin 特征文件读取
         print(f"✅ Qlib 初始化成功（区域: {args.region}）\n")
     except Exception as e:
         print(f"❌ Qlib 初始化失败: {e}")
@@ -166,21 +193,27 @@ def main():
 
     # 加载或训练模型
     model = None
+    train_handler = None  # 训练阶段已拟合的 Alpha158，预测时尽量复用
     if args.model_path:
         try:
             print(f"正在加载模型: {args.model_path}")
-            with open(args.model_path, 'rb') as f:
-                model = pickle.load(f)
+            # joblib.load 通过内存映射加载数组，比 pickle 更快；
+            # 旧的 pickle 模型文件也能正常读取
+            model = joblib.load(args.model_path)
             print("✅ 模型加载成功\n")
         except Exception as e:
             print(f"❌ 模型加载失败: {e}")
             sys.exit(1)
     elif args.train_start and args.train_end:
         try:
-            model = train_model(
+            model, train_handler = train_model(
                 args.provider_uri, args.region, args.market,
                 args.train_start, args.train_end
             )
+            if args.save_model:
+                # 压缩保存，模型文件明显小于原始 pickle
+                joblib.dump(model, args.save_model, compress=3)
+                print(f"✅ 模型已保存到: {args.save_model}")
             print()
         except Exception as e:
             print(f"❌ 模型训练失败: {e}")
@@ -192,13 +225,26 @@ def main():
     # 生成预测信号
     try:
         print("正在生成预测信号...")
-        handler = Alpha158(
-            start_time=args.start_date,
-            end_time=args.end_date,
-            fit_start_time=args.start_date,
-            fit_end_time=args.end_date,
-            instruments=args.market
-        )
+        if (
+            train_handler is not None
+            and args.start_date >= args.train_start
+            and args.end_date <= args.train_end
+        ):
+            # 预测窗口落在训练窗口内：直接复用训练阶段已拟合的 handler，
+            # 不再重新计算和拟合一遍 158 个因子
+            handler = train_handler
+        else:
+            # 预测窗口超出训练窗口时新建 handler，但把拟合区间固定在
+            # 训练窗口上，与训练时使用的统计参数保持一致
+            fit_start = args.train_start or args.start_date
+            fit_end = args.train_end or args.end_date
+            handler = get_or_build_alpha158(
+                start_time=min(args.start_date, fit_start),
+                end_time=max(args.end_date, fit_end),
+                fit_start_time=fit_start,
+                fit_end_time=fit_end,
+                instruments=args.market
+            )
 
         dataset = DatasetH(
             handler=handler,
@@ -212,7 +258,6 @@ def main():
         print(f"✅ 预测信号生成成功，形状: {pred.shape}\n")
     except Exception as e:
         print(f"❌ 生成预测信号失败: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
@@ -222,28 +267,41 @@ def main():
         print(f"选股结果 ({args.start_date} 至 {args.end_date})")
         print("=" * 60)
 
-        # 按日期分组，显示每日 Top-K
-        pred_df = pred.reset_index()
-        pred_df.columns = ['instrument', 'datetime', 'score']
-
-        # 获取每个日期的 Top-K
-        dates = sorted(pred_df['datetime'].unique())[:5]  # 只显示前5个交易日
-
-        for date in dates:
-            date_data = pred_df[pred_df['datetime'] == date].sort_values('score', ascending=False)
-            topk_stocks = date_data.head(args.topk)
-
-            print(f"\n日期: {date}")
-            print(f"{'排名':<6} {'股票代码':<15} {'预测分数':<15}")
-            print("-" * 60)
-            for idx, row in enumerate(topk_stocks.iterrows(), 1):
-                print(f"{idx:<6} {row[1]['instrument']:<15} {row[1]['score']:>14.6f}")
+        # 直接在预测结果自带的 (instrument, datetime) MultiIndex 上按日期
+        # 分组求 Top-K，省去 reset_index 的整列拷贝和对 datetime 列的重新哈希
+        # 把 datetime 换到索引第一层并排序一次，之后按日期取数都是
+        # 索引切片，而不是对整个 datetime 列做布尔掩码扫描
+        pred_by_date = pred.swaplevel().sort_index()
+
+        # 索引已按日期排好序，直接取前5个显示日期并一次切片两层索引，
+        # 既不用对整个窗口的日期做 unique+排序，也不为不显示的日期排名
+        dates = pred_by_date.index.get_level_values('datetime').unique()[:5]
+        pred_display = pred_by_date.loc[dates]
+
+        # 显示日期已截断到 5 个，逐日串行排名即可：
+        # 这个量级下进程级并行的启动开销远大于收益
+        groups = pred_display.groupby(level='datetime', sort=True, group_keys=False)
+        top_per_day = groups.apply(_rank_day, args.topk)
+
+        # 先把所有输出行拼成一个字符串再一次写出，
+        # 避免逐行 print 反复加锁/刷新 stdout，也绕开逐行装箱 Series 的开销
+        lines = []
+        for date, topk_stocks in top_per_day.groupby(level='datetime', sort=True):
+            lines.append(f"\n日期: {date}")
+            lines.append(f"{'排名':<6} {'股票代码':<15} {'预测分数':<15}")
+            lines.append("-" * 60)
+            instruments = topk_stocks.index.get_level_values('instrument')
+            scores = topk_stocks.to_numpy()
+            lines.extend(
+                f"{i:<6} {inst:<15} {score:>14.6f}"
+                for i, (inst, score) in enumerate(zip(instruments, scores), 1)
+            )
+        sys.stdout.write('\n'.join(lines) + '\n')
 
         print("\n" + "=" * 60)
 
     except Exception as e:
         print(f"❌ 选股过程失败: {e}")
-        import traceback
         traceback.print_exc()
 
     # 回测（如果启用）
@@ -295,7 +353,6 @@ def main():
 
         except Exception as e:
             print(f"❌ 回测失败: {e}")
-            import traceback
             traceback.print_exc()
 
     print("\n✅ 选股工具执行完成！")
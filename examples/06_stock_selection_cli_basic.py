@@ -16,10 +16,14 @@
 
 import argparse
 import sys
+import traceback
+import numpy as np
 import qlib
 from qlib.constant import REG_CN, REG_US
 from qlib.data import D
 
+from _cache import enable_buffered_reads
+
 
 def main():
     """主函数"""
@@ -81,7 +85,15 @@ def main():
     # 初始化 Qlib
     try:
         region = REG_CN if args.region == 'cn' else REG_US
-        qlib.init(provider_uri=args.provider_uri, region=region)
+        # 开启磁盘级表达式/数据集缓存：同一因子的解析结果和计算值
+        # 会持久化，CLI 每天跑同一个因子时直接命中缓存而不重新求值
+        qlib.init(
+            provider_uri=args.provider_uri,
+            region=region,
+            expression_cache='DiskExpressionCache',
+            dataset_cache='DiskDatasetCache'
+        )
+        enable_buffered_reads()  # 大块预读缓冲，加速 .bin 特征文件读取
         print(f"✅ Qlib 初始化成功（区域: {args.region}）\n")
     except Exception as e:
         print(f"❌ Qlib 初始化失败: {e}")
@@ -107,24 +119,35 @@ def main():
     try:
         print(f"正在计算因子（{args.start_date} 至 {args.end_date}）...")
 
-        # 使用5日收益率作为选股因子
-        factor_field = '($close - Ref($close, 5)) / Ref($close, 5)'
+        # 把"跨时间求平均"下推到 Qlib 表达式引擎里完成：
+        # 用 Mean(..., window) 在 C 层做滚动平均，只取结束日那一行，
+        # 每只股票返回 1 行，而不是先拉全量时间序列再用 pandas groupby 归约
+        window = len(D.calendar(start_time=args.start_date, end_time=args.end_date))
+        factor_field = (
+            f'Mean(($close - Ref($close, 5)) / Ref($close, 5), {window})'
+        )
 
-        # 获取因子数据
+        # 获取因子数据（start=end=结束日，结果天然是每只股票一行）
         factor_data = D.features(
             instruments=instruments,
             fields=[factor_field],
-            start_time=args.start_date,
+            start_time=args.end_date,
             end_time=args.end_date
         )
 
-        # 计算平均因子值（跨时间平均）
-        factor_mean = factor_data.groupby(level='instrument').mean()
+        factor_mean = factor_data.droplevel('datetime')
         factor_mean.columns = ['factor_value']
 
-        # 排序并选择 Top-K
-        factor_sorted = factor_mean.sort_values('factor_value', ascending=False)
-        selected_stocks = factor_sorted.head(args.topk)
+        # 用 np.argpartition 做 O(N) 的部分选择，只对选出的 K 个做完整排序，
+        # 避免为取 Top-K 而对整个股票池做 O(N log N) 全排序；
+        # NaN 因子值先替换成 -inf，保证沉到队尾不会被选中
+        vals = np.nan_to_num(
+            factor_mean['factor_value'].to_numpy(), nan=-np.inf
+        )
+        k = min(args.topk, vals.size)
+        top_idx = np.argpartition(-vals, k - 1)[:k]
+        top_idx = top_idx[np.argsort(-vals[top_idx])]
+        selected_stocks = factor_mean.iloc[top_idx]
 
         print(f"✅ 选股完成\n")
 
@@ -132,18 +155,21 @@ def main():
         print("=" * 60)
         print(f"选股结果 ({args.start_date} 至 {args.end_date})")
         print("=" * 60)
-        print(f"{'排名':<6} {'股票代码':<15} {'因子值':<15}")
-        print("-" * 60)
-
-        for idx, (stock, row) in enumerate(selected_stocks.iterrows(), 1):
-            print(f"{idx:<6} {stock:<15} {row['factor_value']:>14.6f}")
+        # to_string 在 C 层一次格式化整列，替代逐行 iterrows + f-string
+        # （iterrows 每行都要装箱一个 Series，是 pandas 最慢的访问方式之一）
+        result = selected_stocks.reset_index()
+        result.insert(0, '排名', np.arange(1, len(result) + 1))
+        result.columns = ['排名', '股票代码', '因子值']
+        print(result.to_string(
+            index=False,
+            formatters={'因子值': '{:.6f}'.format}
+        ))
 
         print("=" * 60)
         print(f"\n共选择 {len(selected_stocks)} 只股票")
 
     except Exception as e:
         print(f"❌ 选股过程失败: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
 
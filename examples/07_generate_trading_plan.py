@@ -30,11 +30,56 @@
 
 import argparse
 import csv
+import functools
+import os
 import sys
-from datetime import datetime
-import qlib
-from qlib.constant import REG_CN, REG_US
-from qlib.data import D
+import numpy as np
+import pandas as pd
+
+# Qlib 在各函数内部按需导入：仅 import qlib 就要连带加载约 1 秒的
+# 依赖链，延迟到真正初始化时才导入，--help 等轻量路径不用付这个代价
+
+# 可选依赖：安装了 polars 且数据目录下有列式价格表时走多线程扫描的快路径
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# 可选依赖：大股票池（如 market=all）时用 Numba 把目标数量计算
+# 编译成单个无 Python 对象的融合循环
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _target_qty_kernel(prices, target_amount):
+        n = prices.shape[0]
+        out = np.empty(n, np.int64)
+        for i in range(n):
+            out[i] = int((target_amount / prices[i]) // 100) * 100
+        return out
+
+# 股票数低于该阈值时 JIT 预热开销不划算，仍走 NumPy 向量路径
+_NUMBA_THRESHOLD = 500
+
+# 本进程内已初始化的 (provider_uri, region)，用于跳过重复初始化
+_INIT_KEY = None
+
+
+def _ensure_qlib(provider_uri, region):
+    """初始化 Qlib；同一进程内相同参数的重复调用直接跳过
+
+    Qlib 的初始化要打开日历、股票池等元数据，并不便宜。集中在这里做
+    一次之后，脚本内各函数（以及同进程内的重复运行）不再各自 init。
+    """
+    global _INIT_KEY
+    key = (provider_uri, region)
+    if _INIT_KEY != key:
+        import qlib
+        qlib.init(provider_uri=provider_uri, region=region)
+        _INIT_KEY = key
 
 
 def read_selection_result(file_path):
@@ -45,170 +90,256 @@ def read_selection_result(file_path):
     - CSV格式：股票代码列（如 stock_code 或 instrument）
     - 文本格式：每行一个股票代码
     """
-    stocks = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            # 尝试作为CSV读取
-            try:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # 尝试不同的列名
-                    stock = row.get('stock_code') or row.get('instrument') or row.get('code')
-                    if stock:
-                        stocks.append(stock.strip())
-            except:
-                # 如果不是CSV，按文本文件读取
-                f.seek(0)
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        stocks.append(line)
+        # 先用 pandas 的 C 解析器按列整体读取，
+        # 免去 csv.DictReader 逐行逐格的 Python 级处理
+        try:
+            df = pd.read_csv(file_path, dtype=str, engine='c')
+            col = next(
+                c for c in ('stock_code', 'instrument', 'code')
+                if c in df.columns
+            )
+            return df[col].str.strip().dropna().tolist()
+        except Exception:
+            # 不是带表头的CSV时按文本文件读取，每行一个股票代码
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return [
+                    line for line in (raw.strip() for raw in f)
+                    if line and not line.startswith('#')
+                ]
     except Exception as e:
         print(f"❌ 读取选股结果失败: {e}")
         sys.exit(1)
 
-    return stocks
+
+# 持仓 DataFrame 的标准列
+_POSITION_COLUMNS = ['stock', 'quantity', 'cost_price', 'current_price']
 
 
 def read_current_positions(file_path):
     """
-    读取当前持仓CSV文件
+    读取当前持仓CSV文件，返回列式 DataFrame
+    （列：stock, quantity, cost_price, current_price）
 
     CSV格式要求：
     stock_code,quantity,cost_price,current_price
     SH000001,10000,10.00,10.50
     """
-    positions = {}
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                stock = row.get('stock_code') or row.get('code')
-                if stock:
-                    positions[stock.strip()] = {
-                        'quantity': int(float(row.get('quantity', 0))),
-                        'cost_price': float(row.get('cost_price', 0)),
-                        'current_price': float(row.get('current_price', 0))
-                    }
+        st = os.stat(file_path)
+    except OSError as e:
+        print(f"❌ 读取当前持仓失败: {e}")
+        sys.exit(1)
+
+    # 新账户快路径：只有真正的空文件直接按"无持仓"返回；
+    # 不能按字节数猜内容——紧凑的单行持仓文件可能很短，
+    # 只有表头的文件交给解析路径正常处理（结果同样是空表）
+    if st.st_size == 0:
+        return pd.DataFrame(columns=_POSITION_COLUMNS)
+
+    # 按 (路径, 修改时间, 大小) 记忆化：同进程内重复读取同一份
+    # 未改动的持仓文件（如重试、批量回测）直接命中缓存
+    return _read_positions_cached(file_path, st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_positions_cached(file_path, mtime_ns, size):
+    """实际解析持仓CSV；mtime_ns/size 只作为缓存键使用"""
+    columns = _POSITION_COLUMNS
+    try:
+        # pandas 的 C 解析器按列批量读取和转换类型，
+        # 免去 csv.DictReader 逐行逐格的 Python 级转换
+        df = pd.read_csv(file_path, encoding='utf-8')
+    except pd.errors.EmptyDataError:
+        # 空文件按"无持仓"处理
+        return pd.DataFrame(columns=columns)
     except Exception as e:
         print(f"❌ 读取当前持仓失败: {e}")
         sys.exit(1)
 
-    return positions
+    try:
+        df = df.rename(columns={'stock_code': 'stock', 'code': 'stock'})
+        for col in ('quantity', 'cost_price', 'current_price'):
+            if col not in df.columns:
+                df[col] = 0
+        df = df[columns].dropna(subset=['stock'])
+        df['stock'] = df['stock'].astype(str).str.strip()
+        df['quantity'] = df['quantity'].fillna(0).astype(np.int64)
+        df['cost_price'] = df['cost_price'].fillna(0).astype(np.float64)
+        df['current_price'] = df['current_price'].fillna(0).astype(np.float64)
+        return df
+    except Exception as e:
+        print(f"❌ 读取当前持仓失败: {e}")
+        sys.exit(1)
 
 
-def get_stock_prices(stocks, provider_uri, region, trade_date):
+def _get_prices_polars(stocks, provider_uri, trade_date):
+    """尝试用 Polars 惰性扫描列式价格表读取价格
+
+    如果数据目录下存在导出的 prices.parquet 或 prices.csv（包含
+    instrument/date/close 三列），用 scan + 谓词下推的方式只读需要的
+    行列；Qlib 自带的 .bin 文件无法被 Polars 直接读取，此时返回 None，
+    由调用方退回批量 Qlib 查询。
     """
-    查询股票当前价格
+    if pl is None:
+        return None
+
+    base = os.path.expanduser(provider_uri)
+    parquet_path = os.path.join(base, 'prices.parquet')
+    csv_path = os.path.join(base, 'prices.csv')
+    if os.path.exists(parquet_path):
+        lazy = pl.scan_parquet(parquet_path)
+    elif os.path.exists(csv_path):
+        lazy = pl.scan_csv(csv_path)
+    else:
+        return None
+
+    try:
+        df = (
+            lazy.filter(
+                pl.col('instrument').is_in(list(stocks))
+                & (pl.col('date').cast(pl.Utf8) == trade_date)
+            )
+            .select(['instrument', 'close'])
+            .collect()
+        )
+    except Exception as e:
+        print(f"⚠️ Polars 价格表扫描失败，改用 Qlib 查询: {e}")
+        return None
+
+    return dict(zip(df['instrument'].to_list(), df['close'].to_list()))
+
+
+def get_stock_prices(stocks, provider_uri, trade_date):
+    """
+    批量查询股票当前价格（Qlib 已在 main 中初始化，这里不再重复 init）
 
     参数:
         stocks: 股票代码列表
-        provider_uri: Qlib数据路径
-        region: 市场区域
+        provider_uri: Qlib数据路径（仅用于 Polars 价格表快路径）
         trade_date: 交易日期
     """
-    qlib.init(provider_uri=provider_uri, region=region)
-    prices = {}
+    stocks = list(stocks)
+    prices = dict.fromkeys(stocks)
 
-    for stock in stocks:
+    # 优先走 Polars 列式扫描的快路径（需要数据目录下有导出的价格表）
+    found = _get_prices_polars(stocks, provider_uri, trade_date)
+    if found:
+        prices.update({stock: float(p) for stock, p in found.items()})
+    else:
+        # 一次 D.features 批量读取全部股票的收盘价，
+        # 避免逐只股票各开一次文件、各建一个 DataFrame 的 N 次往返
         try:
-            # 查询收盘价
+            from qlib.data import D
+
             data = D.features(
-                [stock],
+                stocks,
                 ['$close'],
                 start_time=trade_date,
                 end_time=trade_date
             )
             if not data.empty:
-                price = data.iloc[0, 0]
-                prices[stock] = float(price)
-            else:
-                print(f"⚠️ 无法获取 {stock} 的价格，请手动输入")
-                prices[stock] = None
+                close = data['$close'].dropna().groupby(level='instrument').first()
+                prices.update({stock: float(p) for stock, p in close.items()})
         except Exception as e:
-            print(f"⚠️ 查询 {stock} 价格失败: {e}")
-            prices[stock] = None
+            print(f"⚠️ 批量查询价格失败: {e}")
+
+    for stock, price in prices.items():
+        if price is None:
+            print(f"⚠️ 无法获取 {stock} 的价格，请手动输入")
 
     return prices
 
 
 def calculate_target_positions(total_assets, stocks, prices):
     """
-    计算目标持仓
+    计算目标持仓，返回列式 DataFrame
+    （列：stock, weight, target_amount, target_qty, actual_amount, price）
 
     参数:
         total_assets: 总资产
         stocks: 股票代码列表
         prices: 股票价格字典
     """
+    columns = ['stock', 'weight', 'target_amount',
+               'target_qty', 'actual_amount', 'price']
     n_stocks = len(stocks)
     if n_stocks == 0:
-        return {}
+        return pd.DataFrame(columns=columns)
 
     weight = 1.0 / n_stocks
     target_amount = total_assets * weight
 
-    target_positions = {}
-    for stock in stocks:
-        price = prices.get(stock)
-        if price is None or price <= 0:
-            print(f"⚠️ {stock} 价格无效，跳过")
-            continue
-
-        # 计算目标数量（向下取整到100股）
-        target_qty = int((target_amount / price) // 100) * 100
-        actual_amount = target_qty * price
-
-        target_positions[stock] = {
-            'weight': weight,
-            'target_amount': target_amount,
-            'target_qty': target_qty,
-            'actual_amount': actual_amount,
-            'price': price
-        }
+    # 用 NumPy 一次算完所有股票的目标数量（向下取整到100股），
+    # 避免逐只股票的 Python 标量除法/取整循环
+    prices_arr = np.array([prices.get(s) or 0.0 for s in stocks], dtype=np.float64)
+    valid = prices_arr > 0
+    n_skipped = int((~valid).sum())
+    if n_skipped:
+        print(f"⚠️ {n_skipped} 只股票价格无效，已跳过")
+
+    safe_prices = np.where(valid, prices_arr, 1.0)
+    if njit is not None and n_stocks > _NUMBA_THRESHOLD:
+        target_qty = _target_qty_kernel(safe_prices, target_amount)
+    else:
+        target_qty = ((target_amount / safe_prices) // 100).astype(np.int64) * 100
+    actual_amount = target_qty * prices_arr
 
-    return target_positions
+    return pd.DataFrame({
+        'stock': np.asarray(stocks, dtype=object)[valid],
+        'weight': weight,
+        'target_amount': target_amount,
+        'target_qty': target_qty[valid],
+        'actual_amount': actual_amount[valid],
+        'price': prices_arr[valid]
+    }, columns=columns)
 
 
 def calculate_rebalancing(target_positions, current_positions):
     """
-    计算调仓差额
+    计算调仓差额：目标持仓与当前持仓按股票外连接后做整列向量运算，
+    返回列式 DataFrame
+    （列：stock, target_qty, current_qty, diff, action_code, action_qty, price；
+    action_code 为 int8 编码：1=买入，-1=卖出，0=无需操作，
+    中文操作名只在打印/落盘时才生成）
 
     参数:
-        target_positions: 目标持仓字典
-        current_positions: 当前持仓字典
+        target_positions: 目标持仓 DataFrame（calculate_target_positions 的输出）
+        current_positions: 当前持仓 DataFrame（read_current_positions 的输出）
     """
-    rebalancing = {}
-
-    # 处理目标持仓中的股票
-    for stock, target in target_positions.items():
-        current = current_positions.get(stock, {'quantity': 0})
-        current_qty = current['quantity']
-        target_qty = target['target_qty']
-
-        diff = target_qty - current_qty
-        rebalancing[stock] = {
-            'target_qty': target_qty,
-            'current_qty': current_qty,
-            'diff': diff,
-            'action': '买入' if diff > 0 else '卖出' if diff < 0 else '无需操作',
-            'action_qty': abs(diff) if diff != 0 else 0,
-            'price': target['price']
-        }
-
-    # 处理当前持仓中不在目标持仓的股票（需要清仓）
-    for stock, current in current_positions.items():
-        if stock not in target_positions:
-            rebalancing[stock] = {
-                'target_qty': 0,
-                'current_qty': current['quantity'],
-                'diff': -current['quantity'],
-                'action': '卖出',
-                'action_qty': current['quantity'],
-                'price': current.get('current_price', 0)
-            }
-
-    return rebalancing
+    # 一次外连接同时覆盖三种情况：双方都有（调仓）、只在目标持仓中
+    # （新买入）、只在当前持仓中（清仓）
+    merged = pd.merge(
+        target_positions[['stock', 'target_qty', 'price']],
+        current_positions[['stock', 'quantity', 'current_price']],
+        on='stock', how='outer'
+    )
+
+    target_qty = merged['target_qty'].fillna(0).astype(np.int64)
+    current_qty = merged['quantity'].fillna(0).astype(np.int64)
+    diff = target_qty - current_qty
+
+    return pd.DataFrame({
+        'stock': merged['stock'],
+        'target_qty': target_qty,
+        'current_qty': current_qty,
+        'diff': diff,
+        # int8 编码代替中文字符串：每行 1 字节而不是一个 Python 字符串
+        # 对象，后续分类比较也是整数比较而非多字节字符串比较
+        'action_code': np.select(
+            [diff > 0, diff < 0],
+            [np.int8(1), np.int8(-1)],
+            default=np.int8(0)
+        ),
+        'action_qty': diff.abs(),
+        # 有目标价就用目标价，只在需要清仓的股票上退回当前价，
+        # 一次 np.where 完成，不再串联两趟 fillna
+        'price': np.where(
+            merged['price'].notna(),
+            merged['price'],
+            merged['current_price'].fillna(0.0)
+        )
+    })
 
 
 def generate_trading_plan(rebalancing, cash_balance):
@@ -216,38 +347,31 @@ def generate_trading_plan(rebalancing, cash_balance):
     生成交易计划
 
     参数:
-        rebalancing: 调仓计算结果
+        rebalancing: 调仓计算结果 DataFrame（calculate_rebalancing 的输出）
         cash_balance: 现金余额
     """
-    buy_list = []
-    sell_list = []
-    no_action_list = []
-
-    for stock, info in rebalancing.items():
-        if info['action'] == '买入':
-            buy_list.append({
-                'stock': stock,
-                'quantity': info['action_qty'],
-                'price': info['price'],
-                'amount': info['action_qty'] * info['price']
-            })
-        elif info['action'] == '卖出':
-            sell_list.append({
-                'stock': stock,
-                'quantity': info['action_qty'],
-                'price': info['price'],
-                'amount': info['action_qty'] * info['price']
-            })
-        else:
-            no_action_list.append({
-                'stock': stock,
-                'target_qty': info['target_qty'],
-                'current_qty': info['current_qty']
-            })
-
-    # 计算总金额
-    total_buy_amount = sum(item['amount'] for item in buy_list)
-    total_sell_amount = sum(item['amount'] for item in sell_list)
+    # 金额与买/卖分类都是整列运算，不再逐只股票判断；
+    # 分类用 action_code 的整数比较完成
+    amount = rebalancing['action_qty'] * rebalancing['price']
+    buy_mask = rebalancing['action_code'] == 1
+    sell_mask = rebalancing['action_code'] == -1
+
+    buy_list = rebalancing.loc[buy_mask, ['stock', 'action_qty', 'price']].rename(
+        columns={'action_qty': 'quantity'})
+    buy_list['amount'] = amount[buy_mask]
+
+    sell_list = rebalancing.loc[sell_mask, ['stock', 'action_qty', 'price']].rename(
+        columns={'action_qty': 'quantity'})
+    sell_list['amount'] = amount[sell_mask]
+
+    no_action_list = rebalancing.loc[
+        ~(buy_mask | sell_mask), ['stock', 'target_qty', 'current_qty']
+    ]
+
+    # 计算总金额：直接对已切好的 amount 列做一次 C 级归约，
+    # 不再用 Python 生成器二次遍历清单
+    total_buy_amount = float(buy_list['amount'].sum())
+    total_sell_amount = float(sell_list['amount'].sum())
 
     # 资金检查
     available_cash = cash_balance + total_sell_amount - total_buy_amount
@@ -266,99 +390,101 @@ def generate_trading_plan(rebalancing, cash_balance):
 def print_trading_plan(plan, trade_date):
     """
     打印交易计划清单
-    """
-    print("=" * 80)
-    print(f"交易计划清单 - {trade_date}")
-    print("=" * 80)
 
+    所有输出行先攒进列表、拼成一个字符串后一次写出，
+    避免几十次 print 各自加锁、格式化和刷新 stdout
+    """
+    lines = [
+        "=" * 80,
+        f"交易计划清单 - {trade_date}",
+        "=" * 80,
+    ]
+
+    # 各清单整段交给 to_string 做向量化格式化，每列只在 C 层格式化一次，
+    # 不再逐行 itertuples + f-string
     # 卖出清单
-    if plan['sell_list']:
-        print("\n【卖出清单】")
-        print(f"{'序号':<6} {'股票代码':<15} {'卖出数量':<12} {'当前价格':<12} {'预计金额':<15} {'备注':<10}")
-        print("-" * 80)
-        for idx, item in enumerate(plan['sell_list'], 1):
-            remark = "清仓" if item['quantity'] >= 1000 else "减仓"
-            print(f"{idx:<6} {item['stock']:<15} {item['quantity']:<12} "
-                  f"{item['price']:<12.2f} {item['amount']:<15.2f} {remark:<10}")
-        print(f"\n卖出合计: {plan['total_sell_amount']:,.2f} 元")
+    lines.append("\n【卖出清单】")
+    if not plan['sell_list'].empty:
+        sell_df = _plan_section_df(plan['sell_list'], '清仓', '减仓', '卖出数量')
+        lines.append(sell_df.to_string(index=False, float_format='%.2f'))
+        lines.append(f"\n卖出合计: {plan['total_sell_amount']:,.2f} 元")
     else:
-        print("\n【卖出清单】")
-        print("无卖出操作")
+        lines.append("无卖出操作")
 
     # 买入清单
-    if plan['buy_list']:
-        print("\n【买入清单】")
-        print(f"{'序号':<6} {'股票代码':<15} {'买入数量':<12} {'当前价格':<12} {'预计金额':<15} {'备注':<10}")
-        print("-" * 80)
-        for idx, item in enumerate(plan['buy_list'], 1):
-            remark = "新买入" if item['quantity'] >= 1000 else "加仓"
-            print(f"{idx:<6} {item['stock']:<15} {item['quantity']:<12} "
-                  f"{item['price']:<12.2f} {item['amount']:<15.2f} {remark:<10}")
-        print(f"\n买入合计: {plan['total_buy_amount']:,.2f} 元")
+    lines.append("\n【买入清单】")
+    if not plan['buy_list'].empty:
+        buy_df = _plan_section_df(plan['buy_list'], '新买入', '加仓', '买入数量')
+        lines.append(buy_df.to_string(index=False, float_format='%.2f'))
+        lines.append(f"\n买入合计: {plan['total_buy_amount']:,.2f} 元")
     else:
-        print("\n【买入清单】")
-        print("无买入操作")
+        lines.append("无买入操作")
 
     # 无需操作清单
-    if plan['no_action_list']:
-        print("\n【无需操作清单】")
-        print(f"{'股票代码':<15} {'目标数量':<12} {'当前数量':<12} {'说明':<20}")
-        print("-" * 80)
-        for item in plan['no_action_list']:
-            print(f"{item['stock']:<15} {item['target_qty']:<12} "
-                  f"{item['current_qty']:<12} {'持仓正确，无需调整':<20}")
+    if not plan['no_action_list'].empty:
+        lines.append("\n【无需操作清单】")
+        no_action_df = plan['no_action_list'].copy()
+        no_action_df['说明'] = '持仓正确，无需调整'
+        no_action_df.columns = ['股票代码', '目标数量', '当前数量', '说明']
+        lines.append(no_action_df.to_string(index=False))
 
     # 资金检查
-    print("\n【资金检查】")
-    print(f"现金余额: {plan['cash_balance']:,.2f} 元")
-    print(f"卖出总金额: {plan['total_sell_amount']:,.2f} 元")
-    print(f"买入总金额: {plan['total_buy_amount']:,.2f} 元")
-    print(f"执行后可用资金: {plan['available_cash']:,.2f} 元")
+    lines.append("\n【资金检查】")
+    lines.append(f"现金余额: {plan['cash_balance']:,.2f} 元")
+    lines.append(f"卖出总金额: {plan['total_sell_amount']:,.2f} 元")
+    lines.append(f"买入总金额: {plan['total_buy_amount']:,.2f} 元")
+    lines.append(f"执行后可用资金: {plan['available_cash']:,.2f} 元")
 
     if plan['available_cash'] < 0:
-        print("\n⚠️ 警告：资金不足！")
-        print("建议：")
-        print("  1. 先执行卖出操作，释放资金")
-        print("  2. 减少买入数量")
-        print("  3. 分批执行交易计划")
+        lines.append("\n⚠️ 警告：资金不足！")
+        lines.append("建议：")
+        lines.append("  1. 先执行卖出操作，释放资金")
+        lines.append("  2. 减少买入数量")
+        lines.append("  3. 分批执行交易计划")
     else:
-        print("\n✅ 资金充足，可以执行交易计划")
+        lines.append("\n✅ 资金充足，可以执行交易计划")
+
+    lines.append("\n" + "=" * 80)
+    sys.stdout.write('\n'.join(lines) + '\n')
+
 
-    print("\n" + "=" * 80)
+def _plan_section_df(section, remark_high, remark_low, qty_header):
+    """把买入/卖出清单整理成待写出的 DataFrame（序号、中文表头、备注列）"""
+    df = section.copy()
+    df.insert(0, '序号', range(1, len(df) + 1))
+    df['备注'] = np.where(df['quantity'] >= 1000, remark_high, remark_low)
+    df.columns = ['序号', '股票代码', qty_header, '当前价格', '预计金额', '备注']
+    return df
 
 
 def save_trading_plan(plan, output_file, trade_date):
     """
     保存交易计划到CSV文件
+
+    买入/卖出清单整段交给 DataFrame.to_csv 写出，数字格式化在 C 层
+    一次完成，不再逐行 writerow + f-string
     """
     try:
-        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        # 1 MiB 写缓冲：整份计划基本攒满一次 write 系统调用再落盘，
+        # 行数多时不再反复触发默认 8 KiB 缓冲的刷写
+        with open(output_file, 'w', encoding='utf-8', newline='',
+                  buffering=1024 * 1024) as f:
             writer = csv.writer(f)
             writer.writerow(['交易计划清单', trade_date])
             writer.writerow([])
 
             # 卖出清单
             writer.writerow(['卖出清单'])
-            writer.writerow(['序号', '股票代码', '卖出数量', '当前价格', '预计金额', '备注'])
-            for idx, item in enumerate(plan['sell_list'], 1):
-                remark = "清仓" if item['quantity'] >= 1000 else "减仓"
-                writer.writerow([
-                    idx, item['stock'], item['quantity'],
-                    f"{item['price']:.2f}", f"{item['amount']:.2f}", remark
-                ])
+            sell_df = _plan_section_df(plan['sell_list'], '清仓', '减仓', '卖出数量')
+            sell_df.to_csv(f, index=False, float_format='%.2f')
             writer.writerow(['卖出合计', '', '', '', f"{plan['total_sell_amount']:.2f}", ''])
 
             writer.writerow([])
 
             # 买入清单
             writer.writerow(['买入清单'])
-            writer.writerow(['序号', '股票代码', '买入数量', '当前价格', '预计金额', '备注'])
-            for idx, item in enumerate(plan['buy_list'], 1):
-                remark = "新买入" if item['quantity'] >= 1000 else "加仓"
-                writer.writerow([
-                    idx, item['stock'], item['quantity'],
-                    f"{item['price']:.2f}", f"{item['amount']:.2f}", remark
-                ])
+            buy_df = _plan_section_df(plan['buy_list'], '新买入', '加仓', '买入数量')
+            buy_df.to_csv(f, index=False, float_format='%.2f')
             writer.writerow(['买入合计', '', '', '', f"{plan['total_buy_amount']:.2f}", ''])
 
             writer.writerow([])
@@ -398,12 +524,14 @@ def main():
     args = parser.parse_args()
 
     # 初始化Qlib
+    from qlib.constant import REG_CN, REG_US
+
     region = REG_CN if args.region == 'cn' else REG_US
     provider_uri = args.provider_uri
     if args.region == 'us':
         provider_uri = provider_uri.replace('cn_data', 'us_data')
 
-    qlib.init(provider_uri=provider_uri, region=region)
+    _ensure_qlib(provider_uri, region)
 
     print("=" * 80)
     print("交易计划生成工具")
@@ -421,8 +549,12 @@ def main():
 
     # 3. 查询股票价格
     print("\n[3/6] 查询股票价格...")
-    all_stocks = list(set(target_stocks + list(current_positions.keys())))
-    prices = get_stock_prices(all_stocks, provider_uri, region, args.trade_date)
+    # dict.fromkeys 一趟完成去重且保留插入顺序：输出稳定可复现，
+    # 批量 D.features 返回的行序也与请求顺序一致
+    all_stocks = list(dict.fromkeys(
+        [*target_stocks, *current_positions['stock'].tolist()]
+    ))
+    prices = get_stock_prices(all_stocks, provider_uri, args.trade_date)
     print(f"✅ 查询到 {len([p for p in prices.values() if p is not None])} 只股票的价格")
 
     # 4. 计算目标持仓
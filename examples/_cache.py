@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+示例共享的特征缓存与 IO 加速工具
+
+Alpha158 的 158 个因子计算是各示例中最耗时的步骤。本模块提供
+get_or_build_alpha158() 助手：首次运行时正常构建 Alpha158 并把处理结果
+持久化到 ~/.qlib/example_cache/，之后的运行直接从磁盘加载，避免重复
+计算因子表达式。
+
+缓存文件按 (start_time, end_time, instruments, fit_*) 等参数的哈希命名，
+参数不同会生成不同的缓存文件。删除 ~/.qlib/example_cache/ 目录即可强制
+重新计算。
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from qlib.contrib.data.handler import Alpha158
+from qlib.data.dataset.handler import DataHandlerLP
+from qlib.data.dataset.loader import StaticDataLoader
+
+# 缓存目录（与 Qlib 数据目录放在一起）
+CACHE_DIR = os.path.expanduser('~/.qlib/example_cache')
+
+# 本进程内已初始化的 (provider_uri, region)，用于跳过重复初始化
+_INIT_KEY = None
+
+
+def ensure_qlib_init(provider_uri='~/.qlib/qlib_data/cn_data', region=None):
+    """初始化 Qlib，同一进程内相同参数的重复调用直接跳过
+
+    单独运行某个示例和通过 run_all.py 批量运行都会走到这里；
+    批量运行时日历、股票池等元数据只在第一次调用时加载。
+    """
+    global _INIT_KEY
+
+    import qlib
+    from qlib.constant import REG_CN
+
+    if region is None:
+        region = REG_CN
+    key = (provider_uri, region)
+    if _INIT_KEY == key:
+        return
+    qlib.init(provider_uri=provider_uri, region=region)
+    enable_buffered_reads()  # 大块预读缓冲，加速 .bin 特征文件读取
+    _INIT_KEY = key
+
+
+class DataHandlerLite(DataHandlerLP):
+    """从缓存 DataFrame 直接提供数据的轻量处理器
+
+    与 Alpha158 一样支持 fetch() 和 DatasetH，但数据来自磁盘缓存，
+    不再重新计算因子表达式。learn/infer 两套帧分别缓存并按
+    data_key 提供，训练路径（DK_L）拿到的仍是经过 DropnaLabel、
+    标签归一化等 learn 处理器的数据，与首次运行完全一致。
+    """
+
+    def __init__(self, infer_df, learn_df):
+        super().__init__(data_loader=StaticDataLoader(config=infer_df))
+        # 无处理器时 setup 后 _data/_infer/_learn 都指向 infer 帧，
+        # 把 learn 帧单独换上
+        self._learn = learn_df
+
+
+# Feather 不支持 MultiIndex，写缓存时把行索引和两层列名扁平化，
+# 读缓存时按以下标记恢复
+_COL_SEP = '||'
+_IDX_PREFIX = '__index__'
+
+
+def _cache_path(kwargs, kind):
+    """根据构建参数和数据类别（infer/learn）生成缓存文件路径"""
+    key = hashlib.sha1(
+        json.dumps(kwargs, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return os.path.join(CACHE_DIR, f'{key}_{kind}.feather')
+
+
+def _write_cache(df, path):
+    """以列式 Feather + zstd 写缓存
+
+    列式（SoA）布局可以逐列压缩、按列零拷贝读入 numpy，LightGBM 也能
+    直接按列连续地消费特征，比行式的 pickle/CSV 既小又快。
+    """
+    out = df.reset_index()
+    n_idx = df.index.nlevels
+    cols = []
+    for i, c in enumerate(out.columns):
+        if i < n_idx:
+            # 两层列名下 reset_index 会把索引列命名为 ('datetime', '')，
+            # 只取第一层，避免层名被拼上分隔符（如 'datetime||'），
+            # 否则读回后按 level='datetime' 取数会 KeyError
+            name = _IDX_PREFIX + (str(c[0]) if isinstance(c, tuple) else str(c))
+        else:
+            name = _COL_SEP.join(map(str, c)) if isinstance(c, tuple) else str(c)
+        cols.append(name)
+    out.columns = cols
+    out.to_feather(path, compression='zstd')
+
+
+def _read_cache(path):
+    """读取 Feather 缓存并恢复行索引与列名"""
+    out = pd.read_feather(path)
+    idx_cols = [c for c in out.columns if c.startswith(_IDX_PREFIX)]
+    out = out.set_index(idx_cols)
+    out.index = out.index.set_names([c[len(_IDX_PREFIX):] for c in idx_cols])
+    if len(out.columns) and all(_COL_SEP in c for c in out.columns):
+        out.columns = pd.MultiIndex.from_tuples(
+            tuple(c.split(_COL_SEP)) for c in out.columns
+        )
+    return out
+
+
+def downcast_float32(df):
+    """把 DataFrame 中的 float64 列降为 float32
+
+    Alpha158 默认输出 float64，而 LightGBM 的直方图分箱本来就会丢弃
+    多余精度。降为 float32 可以让特征帧内存减半，也让内存带宽受限的
+    训练/评估步骤更快。
+    """
+    f64_cols = df.select_dtypes(include='float64').columns
+    if len(f64_cols):
+        df[f64_cols] = df[f64_cols].astype(np.float32)
+    return df
+
+
+def enable_buffered_reads(buffer_size=1 << 20):
+    """让 Qlib 读取 .bin 特征文件时使用大块预读缓冲
+
+    Qlib 按股票逐文件读取特征，首次（未命中缓存）运行会产生成千上万次
+    小块 read 调用。把存储层使用的 open 换成带 1 MiB 缓冲的版本后，
+    这些小读取都落在预读缓冲里，显著减少系统调用次数。对调用方完全透明，
+    在 qlib.init() 之后调用一次即可。
+    """
+    try:
+        from qlib.data.storage import file_storage
+    except ImportError:
+        # 旧版本 Qlib 没有该模块，跳过即可
+        return
+
+    if getattr(file_storage, '_buffered_open_patched', False):
+        return
+
+    _orig_open = open
+
+    def _buffered_open(file, mode='r', buffering=-1, *args, **kwargs):
+        if 'b' in mode and buffering == -1:
+            buffering = buffer_size
+        return _orig_open(file, mode, buffering, *args, **kwargs)
+
+    file_storage.open = _buffered_open
+    file_storage._buffered_open_patched = True
+
+
+def get_or_build_alpha158(**kwargs):
+    """构建 Alpha158 处理器，优先从磁盘缓存加载
+
+    参数与 Alpha158(...) 完全相同。首次调用会正常计算因子并把 infer/learn
+    两套处理结果分别写入 ~/.qlib/example_cache/，之后相同参数的调用直接
+    读取缓存文件。
+    """
+    infer_path = _cache_path(kwargs, 'infer')
+    learn_path = _cache_path(kwargs, 'learn')
+
+    if os.path.exists(infer_path) and os.path.exists(learn_path):
+        print(f"   （从缓存加载 Alpha158 特征: {infer_path}）")
+        return DataHandlerLite(_read_cache(infer_path), _read_cache(learn_path))
+
+    handler = Alpha158(**kwargs)
+    infer_df = downcast_float32(handler.fetch(data_key=DataHandlerLP.DK_I))
+    learn_df = downcast_float32(handler.fetch(data_key=DataHandlerLP.DK_L))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for df, path in ((infer_df, infer_path), (learn_df, learn_path)):
+            _write_cache(df, path)
+            # 写后立即读回校验一次：索引层名或列名经 Feather 往返后
+            # 不一致的缓存宁可删掉重算，也不能让后续运行拿到坏数据
+            chk = _read_cache(path)
+            if (list(chk.index.names) != list(df.index.names)
+                    or not chk.columns.equals(df.columns)):
+                os.remove(path)
+                raise ValueError('缓存读回校验失败：索引或列名不一致')
+        print(f"   （Alpha158 特征已缓存到: {infer_path}）")
+    except Exception as e:
+        print(f"   ⚠️ 写入特征缓存失败（不影响本次运行）: {e}")
+    return handler
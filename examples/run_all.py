@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量运行示例的会话入口
+
+单独运行每个示例都要各自执行一次 qlib.init（加载日历、股票池等元数据）。
+本脚本在同一进程里初始化一次 Qlib，然后依次运行各示例的 main()，
+把初始化开销摊薄到所有示例上。
+
+使用方法:
+    python examples/run_all.py
+"""
+
+import importlib.util
+import os
+
+from _cache import ensure_qlib_init
+
+# 按学习顺序依次运行的示例
+# （02 需要切换数据区域、06/07 是命令行工具，请单独运行）
+EXAMPLES = [
+    '01_basic_usage.py',
+    '03_feature_extraction.py',
+    '04_model_training.py',
+    '05_backtest.py',
+]
+
+
+def _load_example(filename):
+    """示例文件名以数字开头无法直接 import，用 importlib 按路径加载"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    name = '_' + os.path.splitext(filename)[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    """主函数"""
+    # 只初始化一次，各示例内部的 ensure_qlib_init 会直接跳过
+    ensure_qlib_init()
+
+    for filename in EXAMPLES:
+        print("\n" + "#" * 60)
+        print(f"# 运行示例: {filename}")
+        print("#" * 60 + "\n")
+        _load_example(filename).main()
+
+
+if __name__ == '__main__':
+    main()